@@ -16,12 +16,22 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy import text
 from app.config.env_config import env
 
+try:
+    import orjson  # type: ignore
+    _json_deserializer = orjson.loads
+except ImportError:  # optional speedup; stdlib json is the fallback
+    import json
+    _json_deserializer = json.loads
+
 
 # --- Build database URL ---
 def _build_db_url() -> str:
     return (
         f"postgresql+asyncpg://{env.DB_USER}:{env.DB_PASSWORD}"
         f"@{env.DB_HOST}:{env.DB_PORT}/{env.DB_NAME}"
+        # asyncpg dialect keeps an LRU of prepared statements per connection,
+        # so repeated queries skip the parse/plan round trip
+        f"?prepared_statement_cache_size={env.DB_PREPARED_STATEMENT_CACHE_SIZE}"
     )
 
 
@@ -32,6 +42,8 @@ engine = create_async_engine(
     DATABASE_URL,
     echo=getattr(env, "DB_ECHO", False),
     pool_pre_ping=True,
+    # used by the asyncpg json/jsonb codecs, so jsonb columns arrive as dicts
+    json_deserializer=_json_deserializer,
 )
 
 SessionLocal: async_sessionmaker[AsyncSession] = async_sessionmaker(
@@ -24,6 +24,8 @@ class EnvConfig(BaseSettings):
     PORT: int = Field(default=8080, ge=1, le=65535)
     MODEL_PATH: str = Field(default="xlm-roberta-base", min_length=1)
     MODEL_LABEL_ENCODER_PATH: Optional[str] = None
+    MODEL_INFERENCE_WORKERS: int = Field(default=1, ge=1)  # concurrent inference threads
+    MODEL_SCORE_CACHE_SIZE: int = Field(default=4096, ge=0)  # distinct feature vectors kept scored, 0 disables
 
     # Database configuration
     DB_HOST: str = "localhost"
@@ -31,6 +33,7 @@ class EnvConfig(BaseSettings):
     DB_USER: str = Field(default="postgres", min_length=1)
     DB_PASSWORD: Optional[str] = ""
     DB_NAME: str = Field(default="heron_wellnest", min_length=1)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = Field(default=256, ge=0)  # per connection, 0 disables
 
     # Encryption
     CONTENT_ENCRYPTION_KEY: str = Field(
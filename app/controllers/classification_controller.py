@@ -1,18 +1,20 @@
 from datetime import datetime, timezone, timedelta, date
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import re
-from typing import Dict, Any, List, Optional
-from uuid import UUID as UUIDType
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from uuid import UUID as UUIDType, uuid4
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.repositories.journal_repository import get_journal_by_id
-from app.repositories.mood_entry_repository import get_users_mood_check_ins_for_date
-from app.repositories.gratitude_jar_repository import has_gratitude_entry_for_date
+from app.repositories.journal_repository import get_journals_for_users
+from app.repositories.mood_entry_repository import get_users_mood_check_ins_soa
+from app.repositories.gratitude_jar_repository import has_gratitude_entries_for_users
 from app.services.classification_service import ClassificationService
 from app.utils.logger_util import logger
+from app.utils.np_convert import to_native
 from app.repositories.student_analytics_repository import CreateStudentAnalytics, StudentAnalyticsRepository
-from app.repositories.student_classification_repository import StudentClassificationRepository
-from app.repositories.flip_and_feel_repository import get_flipfeel_by_user_id
+from app.repositories.student_classification_repository import CreateStudentClassification, StudentClassificationRepository
+from app.repositories.flip_and_feel_repository import get_flipfeel_for_users
 from app.services.weekly_classification_service import WeeklyClassificationService
 from app.repositories.student_weekly_classification_repository import StudentWeeklyClassificationRepository
 
@@ -34,57 +36,65 @@ EMOTIONS = [
     "Happy", "Energized", "Excited", "Motivated",
 ]
 
-def _normalize_mood(val: Any) -> Optional[str]:
-    if val is None:
-        return None
-    if isinstance(val, int):
-        return None
-    if isinstance(val, str):
-        name = val.strip()
-        if not name:
-            return None
-        return name[0].upper() + name[1:].lower()
-    return None
+EMOTION_INDEX = {e: i for i, e in enumerate(EMOTIONS)}
+# (feature name, student_analytics column) pairs
+EMOTION_FIELDS = [(name, f"mood_{name.lower()}") for name in EMOTIONS]
 
-def _one_hot_moods(selected: List[Any]) -> Dict[str, int]:
-    hot = {e: 0 for e in EMOTIONS}
-    for raw in selected:
-        name = _normalize_mood(raw)
-        if name in hot:
-            hot[name] = 1
-    return hot
+def _one_hot_block(mood_codes: np.ndarray) -> np.ndarray:
+    # (N, 3) EMOTIONS indices -> (N, len(EMOTIONS)) 0/1 flags in one scatter;
+    # -1 lands in a trailing scratch column that is sliced off
+    hot = np.zeros((len(mood_codes), len(EMOTIONS) + 1), dtype=np.int8)
+    hot[np.arange(len(mood_codes))[:, None], mood_codes] = 1
+    return hot[:, :-1]
 
-import json
-
-def _aggregate_wellness_probs(journals: List[Dict[str, Any]]) -> Dict[str, float]:
-    totals = {k: 0.0 for k in ALL_LABELS}
-    counted = 0
-
-    for item in journals:
-        ws = item.get("wellness_state") or {}
-
-        if isinstance(ws, str):
-            try:
-                ws = json.loads(ws)
-            except json.JSONDecodeError:
-                ws = {}
-
-        any_num = False
-        for k in ALL_LABELS:
-            v = ws.get(k)
-            if v is not None:
-                try:
-                    totals[k] += float(v)
-                    any_num = True
-                except (ValueError, TypeError):
-                    pass
-
-        if any_num:
-            counted += 1
-
-    avgs = {k: (totals[k] / counted if counted else 0.0) for k in ALL_LABELS}
-    return {LABEL_TO_PKEY[k]: avgs[k] for k in ALL_LABELS}
+PKEYS = [LABEL_TO_PKEY[k] for k in ALL_LABELS]
 
+def _wellness_values(ws: Dict[str, Any]):
+    for k in ALL_LABELS:
+        try:
+            yield float(ws[k])
+        except (KeyError, TypeError, ValueError):
+            yield np.nan
+
+def _aggregate_wellness_probs(
+        journals_by_user: Dict[str, List[Dict[str, Any]]],
+        user_ids: List[str],
+) -> np.ndarray:
+    """
+    Average the L1..L5 journal probabilities per user for the whole batch.
+    Returns a (len(user_ids), 5) array whose columns follow PKEYS; users with no
+    numeric wellness_state get zeros. `wellness_state` is already parsed by the repository.
+    """
+    segments: List[int] = []
+    values: List[float] = []
+    for i, uid in enumerate(user_ids):
+        for item in journals_by_user.get(uid, ()):
+            ws = item.get("wellness_state")
+            if not isinstance(ws, dict):
+                continue
+            segments.append(i)
+            values.extend(_wellness_values(ws))
+
+    n_users = len(user_ids)
+    totals = np.zeros((n_users, len(ALL_LABELS)), dtype=np.float64)
+    if not segments:
+        return totals
+
+    arr = np.asarray(values, dtype=np.float64).reshape(len(segments), len(ALL_LABELS))
+    seg = np.asarray(segments, dtype=np.intp)
+    valid = ~np.isnan(arr)
+
+    np.add.at(totals, seg, np.where(valid, arr, 0.0))
+    counted = np.bincount(seg, weights=valid.any(axis=1), minlength=n_users)[:, None]
+    return np.divide(totals, counted, out=np.zeros_like(totals), where=counted > 0)
+
+
+FLIPFEEL_KEYS = [
+    "flipfeel_incrisis_pct",
+    "flipfeel_struggling_pct",
+    "flipfeel_thriving_pct",
+    "flipfeel_excelling_pct",
+]
 
 def _default_flipfeel_pct() -> Dict[str, float]:
     return {
@@ -94,23 +104,6 @@ def _default_flipfeel_pct() -> Dict[str, float]:
         "flipfeel_excelling_pct": 0.0,
     }
 
-def _to_native(obj):
-    if obj is None:
-        return None
-    if isinstance(obj, (np.integer,)):
-        return int(obj)
-    if isinstance(obj, (np.floating,)):
-        return float(obj)
-    if isinstance(obj, (np.bool_ ,)):
-        return bool(obj)
-    if isinstance(obj, np.ndarray):
-        return obj.tolist()
-    if isinstance(obj, dict):
-        return {str(k): _to_native(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple, set)):
-        return [_to_native(v) for v in obj]
-    return obj
-
 def _normalize_flipfeel_label(label: Optional[str]) -> Optional[str]:
     if not label:
         return None
@@ -147,75 +140,168 @@ def _compute_flipfeel_pct_from_sessions(sessions: List[Dict[str, Any]]) -> Dict[
         "flipfeel_excelling_pct": counts["Excelling"] / total,
     }
 
+def _assemble_feature_matrix(
+        columns: List[str],
+        probs: np.ndarray,
+        mood_idx: np.ndarray,
+        grat: np.ndarray,
+        flip: np.ndarray,
+) -> np.ndarray:
+    """
+    Scatter the per-user feature blocks into an (N, len(columns)) float32 matrix in the
+    model's column order: probs (N, 5) by PKEYS, mood_idx (N, 3) integer EMOTIONS indices or -1,
+    grat (N,), flip (N, 4) by FLIPFEEL_KEYS. Columns without a matching feature stay 0.
+    """
+    col_pos = {col: j for j, col in enumerate(columns)}
+    X = np.zeros((len(grat), len(columns)), dtype=np.float32)
+
+    for names, block in ((PKEYS, probs), (FLIPFEEL_KEYS, flip)):
+        src = [k for k, name in enumerate(names) if name in col_pos]
+        X[:, [col_pos[names[k]] for k in src]] = block[:, src]
+
+    if "gratitude_flag" in col_pos:
+        X[:, col_pos["gratitude_flag"]] = grat
+
+    # Trailing -1 lets mood_idx == -1 index straight to "no column"
+    emotion_cols = np.array([col_pos.get(e, -1) for e in EMOTIONS] + [-1], dtype=np.intp)
+    cols = emotion_cols[mood_idx]
+    rows = np.broadcast_to(np.arange(len(grat))[:, None], cols.shape)
+    hit = cols >= 0
+    X[rows[hit], cols[hit]] = 1.0
+    return X
+
+# Bulk fetches send at most this many user ids per query, with a bounded number in flight,
+# so very large cohorts neither build one huge ANY(...) list nor drain the connection pool
+FETCH_CHUNK_SIZE = 500
+MAX_INFLIGHT_FETCHES = 4
+
+async def _fetch_chunked(fetch, user_ids: List[str], for_date: date, sem: asyncio.Semaphore, **kwargs) -> Union[Dict[str, Any], Set[str]]:
+    async def run(chunk: List[str]):
+        async with sem:
+            return await fetch(chunk, for_date, **kwargs)
+
+    parts = await asyncio.gather(*(
+        run(user_ids[i:i + FETCH_CHUNK_SIZE]) for i in range(0, len(user_ids), FETCH_CHUNK_SIZE)
+    ))
+    if not parts:
+        return {}
+    # chunks return either dicts keyed by user_id or sets of user_ids; both merge with update()
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.update(part)
+    return merged
+
+def _uuid_map(user_ids: List[str]) -> Dict[str, Any]:
+    # Parse each id once per batch; ids that are not valid UUIDs map to themselves
+    mapping: Dict[str, Any] = {}
+    for uid in user_ids:
+        try:
+            mapping[uid] = UUIDType(uid)
+        except Exception:
+            mapping[uid] = uid
+    return mapping
+
 class ClassificationController:
     def __init__(
             self,
             classifcation_service: ClassificationService,
             analytics_repo: StudentAnalyticsRepository,
             classification_repo: StudentClassificationRepository,
+            inference_workers: int = 1,
+            session_factory: Optional[async_sessionmaker] = None,
     ):
         self.classifcation_service = classifcation_service
-        self.model_lock = asyncio.Lock()
+        # Dedicated pool so inference never competes with the default executor; the
+        # semaphore keeps queued batches from piling up behind busy workers.
+        self._infer_pool = ThreadPoolExecutor(max_workers=inference_workers, thread_name_prefix="inference")
+        # No lock around the model call: the service keeps per-thread feature buffers, its
+        # score cache has its own lock and predict_proba (n_jobs=1) is thread-safe, so up
+        # to inference_workers batches score in parallel.
+        self._infer_sem = asyncio.Semaphore(inference_workers)
         self.analytics_repo = analytics_repo
         self.classification_repo = classification_repo
+        # One session for the daily writes; defaults to the repositories' factory
+        self.session_factory = session_factory or classification_repo.session_factory
 
     async def classify_today_entries(self, top_k: int = 1):
-        for_date = datetime.now(timezone.utc).date()
+        now_utc = datetime.now(timezone.utc)
+        for_date = now_utc.date()
 
-        mood_rows = await get_users_mood_check_ins_for_date(for_date)
-        if not mood_rows:
+        # user ids plus an (N, 3) array of EMOTIONS indices (-1 for empty/unknown)
+        user_ids, mood_codes = await get_users_mood_check_ins_soa(for_date, EMOTION_INDEX)
+        if not user_ids:
             logger.info("No mood check-ins found for date=%s", for_date)
             return []
 
-        mood_by_user = {row["user_id"]: row for row in mood_rows}
-        user_ids = list(mood_by_user.keys())
+        fetch_sem = asyncio.Semaphore(MAX_INFLIGHT_FETCHES)
 
-        async def build_model_input(uid: str):
-            journals = await get_journal_by_id(uid, for_date, default_wellness={})
-            has_grat = await has_gratitude_entry_for_date(uid, for_date)
-            moods = mood_by_user[uid]
+        async def fetch_flipfeel():
+            try:
+                return await _fetch_chunked(get_flipfeel_for_users, user_ids, for_date, fetch_sem)
+            except Exception:
+                logger.exception("Failed to fetch flip-and-feel sessions for date=%s", for_date)
+                return {}
 
-            probs = _aggregate_wellness_probs(journals)
+        # One query per source per chunk of users instead of one per user
+        journals_by_user, grat_users, sessions_by_user = await asyncio.gather(
+            _fetch_chunked(get_journals_for_users, user_ids, for_date, fetch_sem, default_wellness={}),
+            _fetch_chunked(has_gratitude_entries_for_users, user_ids, for_date, fetch_sem),
+            fetch_flipfeel(),
+        )
 
-            one_hot = _one_hot_moods([
-                moods.get("mood_1"),
-                moods.get("mood_2"),
-                moods.get("mood_3"),
-            ])
+        probs_matrix = _aggregate_wellness_probs(journals_by_user, user_ids)
 
-            try:
-                sessions = await get_flipfeel_by_user_id(uid, for_date)
-            except Exception:
-                sessions = []
-            flipfeel = _compute_flipfeel_pct_from_sessions(sessions)
+        per_user_inputs = []
+        grat_flags: List[int] = []
+        flip_rows: List[List[float]] = []
+        one_hot_rows = _one_hot_block(mood_codes).tolist()
+        for uid, probs_row, hot_row in zip(user_ids, probs_matrix.tolist(), one_hot_rows):
+            probs = dict(zip(PKEYS, probs_row))
+
+            one_hot = dict(zip(EMOTIONS, hot_row))
+
+            flipfeel = _compute_flipfeel_pct_from_sessions(sessions_by_user.get(uid, []))
+
+            gratitude_flag = 1 if uid in grat_users else 0
 
             model_input = {
                 **probs,
-                "gratitude_flag": 1 if has_grat else 0,
+                "gratitude_flag": gratitude_flag,
                 **one_hot,
                 **flipfeel,
             }
 
-            return {
+            per_user_inputs.append({
                 "user_id": uid,
                 "date": str(for_date),
                 "model_input": model_input,
-            }
+            })
+            grat_flags.append(gratitude_flag)
+            flip_rows.append([flipfeel[k] for k in FLIPFEEL_KEYS])
 
-        per_user_inputs = await asyncio.gather(*(build_model_input(uid) for uid in user_ids))
         logger.info(f"Built {len(per_user_inputs)} model inputs for date={for_date} (top_k={top_k})")
 
-        input_batch = [item["model_input"] for item in per_user_inputs]
+        # Column order must match what the model was trained on
+        input_batch = _assemble_feature_matrix(
+            self.classifcation_service.x_columns,
+            probs_matrix,
+            mood_codes,
+            np.array(grat_flags, dtype=np.float32),
+            np.array(flip_rows, dtype=np.float64).reshape(-1, len(FLIPFEEL_KEYS)),
+        )
         loop = asyncio.get_running_loop()
-        async with self.model_lock:
+        async with self._infer_sem:
             clf_results = await loop.run_in_executor(
-                None, lambda: self.classifcation_service.classify_user(input_batch, top_k=top_k)
+                self._infer_pool, lambda: self.classifcation_service.classify_user(input_batch, top_k=top_k)
             )
 
+        uuid_by_uid = _uuid_map(user_ids)
         final = []
+        per_user_rows: List[Tuple[str, CreateStudentAnalytics, Optional[CreateStudentClassification]]] = []
         for item, clf in zip(per_user_inputs, clf_results):
-            prediction = _to_native(clf.get("prediction"))
-            probabilities = _to_native(clf.get("probabilities"))
+            raw_prediction = clf.get("prediction")
+            prediction = raw_prediction.item() if hasattr(raw_prediction, "item") else raw_prediction
+            probabilities = to_native(clf.get("probabilities"))
             final_item = {
                 **item,
                 "prediction": prediction,
@@ -227,20 +313,14 @@ class ClassificationController:
             model_input = item["model_input"]
 
             analytics_kwargs = {
-                "date_recorded": datetime.now(timezone.utc),
+                "date_recorded": now_utc,
                 "gratitude_flag": bool(model_input.get("gratitude_flag", 0)),
-                "p_anxiety": float(model_input.get("p_anxiety")) if model_input.get("p_anxiety") is not None else None,
-                "p_normal": float(model_input.get("p_normal")) if model_input.get("p_normal") is not None else None,
-                "p_stressed": float(model_input.get("p_stressed")) if model_input.get(
-                    "p_stressed") is not None else None,
-                "p_suicidal": float(model_input.get("p_suicidal")) if model_input.get(
-                    "p_suicidal") is not None else None,
-                "p_depressed": float(model_input.get("p_depressed")) if model_input.get(
-                    "p_depressed") is not None else None,
             }
+            for key in PKEYS:
+                v = model_input.get(key)
+                analytics_kwargs[key] = float(v) if v is not None else None
 
-            for name in EMOTIONS:
-                field_name = f"mood_{name.lower()}"
+            for name, field_name in EMOTION_FIELDS:
                 analytics_kwargs[field_name] = int(model_input.get(name, 0))
 
             analytics_kwargs["f_and_f_in_crisis"] = float(model_input.get("flipfeel_incrisis_pct", 0.0))
@@ -253,20 +333,51 @@ class ClassificationController:
 
             is_flagged = True if (prediction == "InCrisis" or prediction == "Struggling") else False
 
-            payload = CreateStudentAnalytics(**analytics_kwargs)
+            classification_row = None
+            student_uuid = uuid_by_uid[uid]
+            if prediction is None:
+                logger.warning("No prediction for user=%s; skipping classification row", uid)
+            elif not isinstance(student_uuid, UUIDType):
+                logger.warning("user_id=%s is not a valid UUID; skipping classification row", uid)
+            else:
+                classification_row = CreateStudentClassification(student_id=student_uuid, classification=prediction)
+            per_user_rows.append((uid, CreateStudentAnalytics(**analytics_kwargs), classification_row))
+
+        await self._persist_daily_rows(per_user_rows, for_date)
+
+        return final
 
+    async def _persist_daily_rows(
+            self,
+            per_user_rows: List[Tuple[str, CreateStudentAnalytics, Optional[CreateStudentClassification]]],
+            for_date: date,
+    ) -> None:
+        """
+        Write every user's analytics and classification rows in one transaction. If that
+        fails (e.g. one row violates a constraint), retry user by user, each in its own
+        transaction, so a bad row only loses that user's writes.
+        """
+        if not per_user_rows:
+            return
+        try:
+            async with self.session_factory() as session:
+                await self.analytics_repo.bulk_create_in_session([a for _, a, _ in per_user_rows], session)
+                await self.classification_repo.bulk_create_in_session([c for _, _, c in per_user_rows if c is not None], session)
+                await session.commit()
+            return
+        except Exception:
+            logger.exception("Bulk persist of %d users failed for date=%s; retrying per user", len(per_user_rows), for_date)
+
+        for uid, analytics_payload, classification_row in per_user_rows:
             try:
-                await self.analytics_repo.create(payload)
-                try:
-                    student_uuid = UUIDType(uid)
-                except Exception:
-                    student_uuid = uid
-                await self.classification_repo.create(student_uuid, prediction)
+                async with self.session_factory() as session:
+                    await self.analytics_repo.bulk_create_in_session([analytics_payload], session)
+                    if classification_row is not None:
+                        await self.classification_repo.bulk_create_in_session([classification_row], session)
+                    await session.commit()
             except Exception as exc:
                 logger.exception("Failed to persist analytics/classification for user=%s: %s", uid, exc)
 
-        return final
-
     async def classify_weekly_entries(self, days: int = 7):
         """
         Find all students who have daily classifications within the computed week range
@@ -278,53 +389,72 @@ class ClassificationController:
         week_start = datetime(start_date.year, start_date.month, start_date.day, tzinfo=timezone.utc)
         week_end = datetime(end_date.year, end_date.month, end_date.day, tzinfo=timezone.utc) + timedelta(days=1)
 
-        try:
-            classifications_in_range = await self.classification_repo.list_between(week_start, week_end)
-        except AttributeError:
-            try:
-                all_items = await self.classification_repo.list_all(limit=10000)
-            except AttributeError:
-                raise RuntimeError("classification repository lacks `list_between` and `list_all` methods; adapt to repo API")
-            classifications_in_range = [
-                it for it in all_items
-                if getattr(it, "classified_at", None) is not None
-                   and (it.classified_at >= week_start and it.classified_at < week_end)
-            ]
+        weekly_repo = StudentWeeklyClassificationRepository()
+        weekly_service = WeeklyClassificationService(self.classification_repo, weekly_repo)
+        now_utc = datetime.now(timezone.utc)
 
-        if not classifications_in_range:
-            logger.info("No student classifications found for week range=%s..%s", start_date, end_date)
-            return []
+        # One session for the whole week: a single read, then a single multi-row insert
+        async with self.session_factory() as session:
+            week_rows = await self.classification_repo.list_between(week_start, week_end, session=session)
 
-        def _student_id_from_item(it):
-            sid = getattr(it, "student_id", None)
-            if sid is None:
-                sid = getattr(it, "student", None)
-            if sid is None:
-                sid = getattr(it, "user_id", None)
-            return str(sid) if sid is not None else None
+            # list_between is newest first; group per student oldest first
+            entries_by_student: Dict[Any, List[Any]] = {}
+            for row in reversed(week_rows):
+                entries_by_student.setdefault(row.student_id, []).append(row)
 
-        student_ids = { _student_id_from_item(it) for it in classifications_in_range }
-        student_ids.discard(None)
-        user_ids = list(student_ids)
+            if not entries_by_student:
+                logger.info("No student classifications found for week range=%s..%s", start_date, end_date)
+                return []
 
-        weekly_service = WeeklyClassificationService(self.classification_repo, StudentWeeklyClassificationRepository())
+            student_ids = list(entries_by_student.keys())
+            user_ids = [str(sid) for sid in student_ids]
 
-        tasks = []
-        for uid in user_ids:
+            # The week's rows are already loaded and nothing is written per student, so each
+            # call is pure CPU work: a plain loop, no gather or concurrency limit needed.
+            results = []
+            for sid, uid in zip(student_ids, user_ids):
+                try:
+                    results.append(await weekly_service.classify_and_record_week(
+                        sid, week_start, week_end, week_entries=entries_by_student[sid], persist=False,
+                    ))
+                except Exception as exc:
+                    logger.exception("Failed weekly classification for user=%s: %s", uid, exc)
+
+            weekly_rows = [
+                {
+                    "weekly_classification_id": uuid4(),
+                    "student_id": res["student_id"],
+                    "week_start": week_start,
+                    "week_end": week_end,
+                    "dominant_classification": res["dominant_classification"],
+                    "classified_at": now_utc,
+                }
+                for res in results
+            ]
             try:
-                student_uuid = UUIDType(uid)
+                await weekly_repo.bulk_create(weekly_rows, session=session)
+                await session.commit()
             except Exception:
-                student_uuid = uid
-            tasks.append(weekly_service.classify_and_record_week(student_uuid, week_start, week_end))
-
-        raw_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        results = []
-        for uid, res in zip(user_ids, raw_results):
-            if isinstance(res, Exception):
-                logger.exception("Failed weekly classification for user=%s: %s", uid, res)
+                # e.g. one duplicate week or constraint violation: retry student by student,
+                # each in its own transaction, so only the bad rows fail
+                await session.rollback()
+                logger.exception(
+                    "Bulk persist of %d weekly classifications failed range=%s..%s; retrying per student",
+                    len(weekly_rows), start_date, end_date,
+                )
+                for res, row in zip(results, weekly_rows):
+                    try:
+                        await weekly_repo.bulk_create([row], session=session)
+                        await session.commit()
+                    except Exception as exc:
+                        await session.rollback()
+                        logger.exception("Failed to persist weekly classification for user=%s: %s", res["student_id"], exc)
+                        res["reasons"].append(f"persist_error: {exc}")
+                    else:
+                        res["persisted_row"] = row
             else:
-                results.append(res)
+                for res, row in zip(results, weekly_rows):
+                    res["persisted_row"] = row
 
         logger.info("Completed weekly classification for %d users range=%s..%s", len(user_ids), start_date, end_date)
         return results
\ No newline at end of file
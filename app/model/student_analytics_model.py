@@ -63,35 +63,23 @@ class StudentAnalytics(Base):
     )
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data: Dict[str, Any] = {
             "analytics_id": str(self.analytics_id) if self.analytics_id else None,
             "date_recorded": self.date_recorded.isoformat() if isinstance(self.date_recorded, datetime) else None,
             "gratitude_flag": bool(self.gratitude_flag),
-            "p_anxiety": float(self.p_anxiety) if self.p_anxiety is not None else None,
-            "p_normal": float(self.p_normal) if self.p_normal is not None else None,
-            "p_stressed": float(self.p_stressed) if self.p_stressed is not None else None,
-            "p_suicidal": float(self.p_suicidal) if self.p_suicidal is not None else None,
-            "p_depressed": float(self.p_depressed) if self.p_depressed is not None else None,
-            "mood_happy": int(self.mood_happy) if self.mood_happy is not None else None,
-            "mood_energized": int(self.mood_energized) if self.mood_energized is not None else None,
-            "mood_excited": int(self.mood_excited) if self.mood_excited is not None else None,
-            "mood_motivated": int(self.mood_motivated) if self.mood_motivated is not None else None,
-            "mood_calm": int(self.mood_calm) if self.mood_calm is not None else None,
-            "mood_relaxed": int(self.mood_relaxed) if self.mood_relaxed is not None else None,
-            "mood_peaceful": int(self.mood_peaceful) if self.mood_peaceful is not None else None,
-            "mood_content": int(self.mood_content) if self.mood_content is not None else None,
-            "mood_anxious": int(self.mood_anxious) if self.mood_anxious is not None else None,
-            "mood_angry": int(self.mood_angry) if self.mood_angry is not None else None,
-            "mood_stressed": int(self.mood_stressed) if self.mood_stressed is not None else None,
-            "mood_restless": int(self.mood_restless) if self.mood_restless is not None else None,
-            "mood_depressed": int(self.mood_depressed) if self.mood_depressed is not None else None,
-            "mood_sad": int(self.mood_sad) if self.mood_sad is not None else None,
-            "mood_exhausted": int(self.mood_exhausted) if self.mood_exhausted is not None else None,
-            "mood_hopeless": int(self.mood_hopeless) if self.mood_hopeless is not None else None,
-            "f_and_f_in_crisis": float(self.f_and_f_in_crisis) if self.f_and_f_in_crisis is not None else None,
-            "f_and_f_struggling": float(self.f_and_f_struggling) if self.f_and_f_struggling is not None else None,
-            "f_and_f_thriving": float(self.f_and_f_thriving) if self.f_and_f_thriving is not None else None,
-            "f_and_f_excelling": float(self.f_and_f_excelling) if self.f_and_f_excelling is not None else None,
-            "f_and_f_final_category": float(self.f_and_f_final_category) if self.f_and_f_final_category is not None else None,
-            "classification": (self.classification.value if isinstance(self.classification, ClassificationLabel) else (str(self.classification) if self.classification is not None else None)),
-        }
\ No newline at end of file
+        }
+        for col, caster in _COLUMN_CASTERS:
+            v = getattr(self, col)
+            data[col] = caster(v) if v is not None else None
+        data["classification"] = _CLF_VALUES.get(self.classification, str(self.classification)) if self.classification is not None else None
+        return data
+
+
+# (column, caster) pairs serialized by StudentAnalytics.to_dict, in output order
+_COLUMN_CASTERS = tuple(
+    (col.name, float if isinstance(col.type, Float) else int)
+    for col in StudentAnalytics.__table__.columns
+    if isinstance(col.type, (Float, Integer))
+)
+
+_CLF_VALUES = {m: m.value for m in ClassificationLabel}
@@ -4,7 +4,6 @@ from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ENUM as PG_ENUM
 from sqlalchemy.orm import declarative_base
 import uuid
 from typing import Dict, Any
-from datetime import datetime
 
 Base = declarative_base()
 
@@ -47,9 +46,10 @@ class StudentClassification(Base):
 
     def to_dict(self) -> Dict[str, Any]:
         """Return JSON\-serializable dict of the row."""
+        # Typed columns: UUIDs, ClassificationLabel and datetime come back as such, so only None needs guarding
         return {
-            "classification_id": str(self.classification_id) if self.classification_id else None,
-            "student_id": str(self.student_id) if self.student_id else None,
-            "classification": (self.classification.value if isinstance(self.classification, ClassificationLabel) else str(self.classification)) if self.classification is not None else None,
-            "classified_at": self.classified_at.isoformat() if isinstance(self.classified_at, datetime) else None,
+            "classification_id": str(self.classification_id) if self.classification_id is not None else None,
+            "student_id": str(self.student_id) if self.student_id is not None else None,
+            "classification": self.classification.value if self.classification is not None else None,
+            "classified_at": self.classified_at.isoformat() if self.classified_at is not None else None,
         }
\ No newline at end of file
@@ -1,7 +1,6 @@
 from sqlalchemy import Column, DateTime, Boolean, func
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, ENUM as PG_ENUM
 from typing import Dict, Any
-from datetime import datetime
 import uuid
 from enum import Enum
 from app.model.student_classification_model import Base
@@ -60,12 +59,13 @@ class StudentWeeklyClassification(Base):
     )
 
     def to_dict(self) -> Dict[str, Any]:
+        # Typed columns: only None (unflushed server defaults) needs guarding
         return {
-            "weekly_classification_id": str(self.weekly_classification_id) if self.weekly_classification_id else None,
-            "student_id": str(self.student_id) if self.student_id else None,
-            "week_start": self.week_start.isoformat() if isinstance(self.week_start, datetime) else None,
-            "week_end": self.week_end.isoformat() if isinstance(self.week_end, datetime) else None,
-            "dominant_classification": (self.dominant_classification.value if isinstance(self.dominant_classification, WeeklyClassificationLabel) else str(self.dominant_classification)) if self.dominant_classification is not None else None,
+            "weekly_classification_id": str(self.weekly_classification_id) if self.weekly_classification_id is not None else None,
+            "student_id": str(self.student_id) if self.student_id is not None else None,
+            "week_start": self.week_start.isoformat() if self.week_start is not None else None,
+            "week_end": self.week_end.isoformat() if self.week_end is not None else None,
+            "dominant_classification": self.dominant_classification.value if self.dominant_classification is not None else None,
             "is_flagged": bool(self.is_flagged),
-            "classified_at": self.classified_at.isoformat() if isinstance(self.classified_at, datetime) else None,
+            "classified_at": self.classified_at.isoformat() if self.classified_at is not None else None,
         }
\ No newline at end of file
@@ -1,24 +1,9 @@
 # python
 # File: app/repositories/flip_and_feel_repository.py
-from typing import List, Optional, Dict, Any, Union, Tuple
-from datetime import datetime, date, timedelta
+from typing import List, Optional, Dict, Any, Union
+from datetime import datetime, date
+from app.utils.date_bounds import day_bounds
 from app.utils.db_utils import fetch_all
-import collections
-
-def _day_bounds(for_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
-    """
-    Normalize a date-like input to start/end datetimes for that day \[start, next day).
-    Accepts 'YYYY-MM-DD' string, date, or datetime.
-    """
-    if isinstance(for_date, str):
-        d = datetime.strptime(for_date, "%Y-%m-%d").date()
-    elif isinstance(for_date, datetime):
-        d = for_date.date()
-    else:
-        d = for_date
-    start = datetime(d.year, d.month, d.day, 0, 0, 0)
-    end = start + timedelta(days=1)
-    return start, end
 
 async def get_flipfeel_by_user_id(
     user_id: str,
@@ -32,7 +17,7 @@ async def get_flipfeel_by_user_id(
       - finished_at
       - mood_labels: ordered list of mood_label values (may contain None if choice/mood missing)
     """
-    start_dt, end_dt = _day_bounds(for_date)
+    start_dt, end_dt = day_bounds(for_date)
 
     query = """
         SELECT ff.flip_feel_id,
@@ -55,7 +40,7 @@ async def get_flipfeel_by_user_id(
     if not rows:
         return []
 
-    sessions = collections.OrderedDict()
+    sessions: Dict[Any, Dict[str, Any]] = {}
     for row in rows:
         fid = row.get("flip_feel_id")
         if fid not in sessions:
@@ -70,73 +55,115 @@ async def get_flipfeel_by_user_id(
 
     return list(sessions.values())
 
-async def get_users_flipfeel_for_date(
+async def get_flipfeel_for_users(
+    user_ids: List[str],
     for_date: Union[str, date, datetime]
-) -> List[Dict[str, Any]]:
+) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Return one row per user for flip\_feel sessions on `for_date`.
-    Each returned dict contains:
-      - user_id (string)
-      - mood_1, mood_2, mood_3 (first three mood_label values from the user's latest session that day, or None)
-    This is suitable for mapping into the controller's mood_1..mood_3 expectations.
+    Batched variant of `get_flipfeel_by_user_id`: one query for all `user_ids`.
+    Returns a dict keyed by user_id (string) whose values are that user's sessions,
+    in the same shape as `get_flipfeel_by_user_id`. Users without sessions are absent.
     """
-    start_dt, end_dt = _day_bounds(for_date)
+    if not user_ids:
+        return {}
+
+    start_dt, end_dt = day_bounds(for_date)
 
     query = """
-        SELECT ff.user_id,
-               ff.flip_feel_id,
+        SELECT ff.flip_feel_id,
+               ff.user_id,
                ff.started_at,
+               ff.finished_at,
                r.choice_id,
                c.mood_label,
                r.created_at as response_created_at
         FROM flip_feel ff
         JOIN flip_feel_responses r ON ff.flip_feel_id = r.flip_feel_id
         LEFT JOIN flip_feel_choices c ON r.choice_id = c.choice_id
-        WHERE ff.started_at >= :start_dt AND ff.started_at < :end_dt
-        ORDER BY ff.user_id ASC, ff.started_at DESC, r.created_at ASC
+        WHERE ff.user_id = ANY(:user_ids)
+          AND ff.started_at >= :start_dt AND ff.started_at < :end_dt
+        ORDER BY ff.user_id ASC, ff.started_at ASC, r.created_at ASC
     """
-    params = {"start_dt": start_dt, "end_dt": end_dt}
+    params = {"user_ids": list(user_ids), "start_dt": start_dt, "end_dt": end_dt}
     rows = await fetch_all(query, params)
 
     if not rows:
-        return []
+        return {}
 
-    # Group rows by user -> then by flip_feel_id to reconstruct sessions.
-    users_sessions: Dict[str, Dict[str, Any]] = {}
+    users_sessions: Dict[str, Dict[Any, Dict[str, Any]]] = {}
     for row in rows:
         user = row.get("user_id")
         if user is None:
             continue
         user_key = str(user)
+        sess_map = users_sessions.setdefault(user_key, {})
         fid = row.get("flip_feel_id")
-        if user_key not in users_sessions:
-            users_sessions[user_key] = {"sessions": collections.OrderedDict()}
-        sess_map = users_sessions[user_key]["sessions"]
         if fid not in sess_map:
             sess_map[fid] = {
                 "flip_feel_id": fid,
+                "user_id": user_key,
                 "started_at": row.get("started_at"),
+                "finished_at": row.get("finished_at"),
                 "mood_labels": [],
             }
         sess_map[fid]["mood_labels"].append(row.get("mood_label"))
 
+    return {uid: list(sess_map.values()) for uid, sess_map in users_sessions.items()}
+
+async def get_users_flipfeel_for_date(
+    for_date: Union[str, date, datetime]
+) -> List[Dict[str, Any]]:
+    """
+    Return one row per user for flip\_feel sessions on `for_date`.
+    Each returned dict contains:
+      - user_id (string)
+      - mood_1, mood_2, mood_3 (first three mood_label values from the user's latest session that day, or None)
+    This is suitable for mapping into the controller's mood_1..mood_3 expectations.
+    """
+    start_dt, end_dt = day_bounds(for_date)
+
+    # Only sessions with at least one response are ranked, so a trailing empty
+    # session never hides the user's latest answered one.
+    query = """
+        WITH latest_session AS (
+            SELECT
+                ff.user_id,
+                ff.flip_feel_id,
+                ROW_NUMBER() OVER (
+                    PARTITION BY ff.user_id
+                    ORDER BY ff.started_at DESC
+                ) AS rn
+            FROM flip_feel ff
+            WHERE ff.started_at >= :start_dt AND ff.started_at < :end_dt
+              AND ff.user_id IS NOT NULL
+              AND EXISTS (
+                  SELECT 1 FROM flip_feel_responses r0
+                  WHERE r0.flip_feel_id = ff.flip_feel_id
+              )
+        )
+        SELECT ls.user_id,
+               (array_agg(c.mood_label ORDER BY r.created_at ASC))[1:3] AS moods
+        FROM latest_session ls
+        JOIN flip_feel_responses r ON ls.flip_feel_id = r.flip_feel_id
+        LEFT JOIN flip_feel_choices c ON r.choice_id = c.choice_id
+        WHERE ls.rn = 1
+        GROUP BY ls.user_id
+        ORDER BY ls.user_id
+    """
+    params = {"start_dt": start_dt, "end_dt": end_dt}
+    rows = await fetch_all(query, params)
+
+    if not rows:
+        return []
+
     results: List[Dict[str, Any]] = []
-    # For each user pick the latest session (ordered by started_at DESC in the query)
-    for user_id, data in users_sessions.items():
-        sessions = list(data["sessions"].values())
-        if not sessions:
-            continue
-        # sessions list is ordered by query ordering — first is latest due to ff.started_at DESC
-        latest = sessions[0]
-        labels = latest.get("mood_labels", [])[:3]
-        # pad to 3
-        while len(labels) < 3:
-            labels.append(None)
+    for row in rows:
+        moods = row.get("moods") or []
         results.append({
-            "user_id": user_id,
-            "mood_1": labels[0],
-            "mood_2": labels[1],
-            "mood_3": labels[2],
+            "user_id": str(row.get("user_id")),
+            "mood_1": moods[0] if len(moods) > 0 else None,
+            "mood_2": moods[1] if len(moods) > 1 else None,
+            "mood_3": moods[2] if len(moods) > 2 else None,
         })
 
-    return results
\ No newline at end of file
+    return results
@@ -1,21 +1,7 @@
-from typing import Union, Tuple
-from datetime import datetime, date, timedelta
-from app.utils.db_utils import fetch_one
-
-def _day_bounds(for_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
-    """
-    Normalize a date-like input to start/end datetimes for that day \[start, next day).
-    Accepts 'YYYY-MM-DD' string, date, or datetime.
-    """
-    if isinstance(for_date, str):
-        d = datetime.strptime(for_date, "%Y-%m-%d").date()
-    elif isinstance(for_date, datetime):
-        d = for_date.date()
-    else:
-        d = for_date
-    start = datetime(d.year, d.month, d.day, 0, 0, 0)
-    end = start + timedelta(days=1)
-    return start, end
+from typing import Union, List, Set
+from datetime import datetime, date
+from app.utils.date_bounds import day_bounds
+from app.utils.db_utils import fetch_one, fetch_all
 
 async def has_gratitude_entry_for_date(
     user_id: str,
@@ -24,7 +10,7 @@ async def has_gratitude_entry_for_date(
     """
     Return True if at least one `gratitude_entries` record exists for the user within the given day, else False.
     """
-    start_dt, end_dt = _day_bounds(for_date)
+    start_dt, end_dt = day_bounds(for_date)
 
     query = """
         SELECT 1
@@ -36,4 +22,29 @@ async def has_gratitude_entry_for_date(
     """
     params = {"user_id": user_id, "start_dt": start_dt, "end_dt": end_dt}
     row = await fetch_one(query, params)
-    return bool(row)
\ No newline at end of file
+    return bool(row)
+
+async def has_gratitude_entries_for_users(
+    user_ids: List[str],
+    for_date: Union[str, date, datetime],
+) -> Set[str]:
+    """
+    Batched variant of `has_gratitude_entry_for_date`: one query for all `user_ids`.
+    Returns the subset of user_ids (as strings) with at least one `gratitude_entries`
+    record within the given day.
+    """
+    if not user_ids:
+        return set()
+
+    start_dt, end_dt = day_bounds(for_date)
+
+    query = """
+        SELECT DISTINCT user_id
+        FROM gratitude_entries
+        WHERE user_id = ANY(:user_ids)
+          AND is_deleted = FALSE
+          AND created_at >= :start_dt AND created_at < :end_dt
+    """
+    params = {"user_ids": list(user_ids), "start_dt": start_dt, "end_dt": end_dt}
+    rows = await fetch_all(query, params)
+    return {str(row.get("user_id")) for row in rows}
@@ -1,22 +1,30 @@
-from typing import List, Optional, Dict, Any, Union, Tuple
-from datetime import datetime, date, timedelta
+from typing import List, Optional, Dict, Any, Union
+from datetime import datetime, date
+from app.utils.date_bounds import day_bounds
 from app.utils.db_utils import fetch_all
-import json
+from app.utils.logger_util import logger
 
-def _day_bounds(for_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
-    """
-    Normalize a date-like input to start/end datetimes for that day \[start, next day).
-    Accepts 'YYYY-MM-DD' string, date, or datetime.
-    """
-    if isinstance(for_date, str):
-        d = datetime.strptime(for_date, "%Y-%m-%d").date()
-    elif isinstance(for_date, datetime):
-        d = for_date.date()
-    else:
-        d = for_date
-    start = datetime(d.year, d.month, d.day, 0, 0, 0)
-    end = start + timedelta(days=1)
-    return start, end
+try:
+    import orjson  # type: ignore
+    _json_loads = orjson.loads
+except ImportError:  # optional speedup; stdlib json is the fallback
+    import json
+    _json_loads = json.loads
+
+def _wellness_or_default(row: Dict[str, Any], default_wellness: Dict[str, Any]) -> Any:
+    # json/jsonb values arrive decoded by the driver's codec; text values are parsed
+    # here per row, so one malformed entry falls back to the default instead of
+    # failing the whole query.
+    wellness = row.get("wellness_state")
+    if wellness is None:
+        return default_wellness
+    if isinstance(wellness, (str, bytes)):
+        try:
+            return _json_loads(wellness)
+        except Exception as e:
+            logger.warning("Failed to parse wellness_state: %s; using default", e)
+            return default_wellness
+    return wellness
 
 async def get_journal_by_id(
     user_id: str,
@@ -28,14 +36,14 @@ async def get_journal_by_id(
     Returns a list (possibly empty). Each item contains:
       - journal_id
       - content_encrypted
-      - wellness_state (parsed dict or default_wellness)
+      - wellness_state (decoded json or default_wellness)
     """
     if default_wellness is None:
         default_wellness = {}
 
-    start_dt, end_dt = _day_bounds(for_date)
+    start_dt, end_dt = day_bounds(for_date)
 
-    print(f"📥 Fetching journal entries for user_id={user_id} date={for_date}")
+    logger.debug("Fetching journal entries for user_id=%s date=%s", user_id, for_date)
     query = """
         SELECT wellness_state
         FROM journal_entries
@@ -48,26 +56,45 @@ async def get_journal_by_id(
     rows = await fetch_all(query, params)
 
     if not rows:
-        print("ℹ️ No journal entries found — returning empty list")
+        logger.debug("No journal entries found for user_id=%s", user_id)
         return []
 
-    results: List[Dict[str, Any]] = []
-    for row in rows:
-        wellness_raw = row.get("wellness_state")
-        if wellness_raw is None:
-            wellness = default_wellness
-        elif isinstance(wellness_raw, (dict, list)):
-            wellness = wellness_raw
-        else:
-            try:
-                wellness = json.loads(wellness_raw)
-            except Exception as e:
-                print(f"⚠️ Failed to parse wellness_state for journal_id={row.get('journal_id')}: {e}; using default")
-                wellness = default_wellness
+    return [{"wellness_state": _wellness_or_default(row, default_wellness)} for row in rows]
+
+async def get_journals_for_users(
+    user_ids: List[str],
+    for_date: Union[str, date, datetime],
+    default_wellness: Optional[Dict[str, Any]] = None
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Fetch journal entries for many users within the given date in a single query.
+    Returns a dict keyed by user_id (string) whose values have the same shape as
+    `get_journal_by_id`. Users without entries are absent from the dict.
+    """
+    if default_wellness is None:
+        default_wellness = {}
+    if not user_ids:
+        return {}
 
-        results.append({
-            "wellness_state": wellness
+    start_dt, end_dt = day_bounds(for_date)
+
+    logger.debug("Fetching journal entries for %d users date=%s", len(user_ids), for_date)
+    query = """
+        SELECT user_id, wellness_state
+        FROM journal_entries
+        WHERE user_id = ANY(:user_ids)
+          AND is_deleted = FALSE
+          AND created_at >= :start_dt AND created_at < :end_dt
+        ORDER BY created_at ASC
+    """
+    params = {"user_ids": list(user_ids), "start_dt": start_dt, "end_dt": end_dt}
+    rows = await fetch_all(query, params)
+
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        results.setdefault(str(row.get("user_id")), []).append({
+            "wellness_state": _wellness_or_default(row, default_wellness)
         })
 
-    print(f"📤 Returning {len(results)} journal entries")
-    return results
\ No newline at end of file
+    logger.debug("Returning %d journal entries for %d users", len(rows), len(results))
+    return results
@@ -1,32 +1,10 @@
-from typing import Union, Tuple, List, Dict, Any
-from datetime import datetime, date, timedelta
+from typing import Union, List, Dict, Any, Tuple
+from datetime import datetime, date
+import numpy as np
+from app.utils.date_bounds import day_bounds
 from app.utils.db_utils import fetch_all
 
-def _day_bounds(for_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
-    """
-    Normalize a date-like input to start/end datetimes for that day [start, next day).
-    Accepts 'YYYY-MM-DD' string, date, or datetime.
-    """
-    if isinstance(for_date, str):
-        d = datetime.strptime(for_date, "%Y-%m-%d").date()
-    elif isinstance(for_date, datetime):
-        d = for_date.date()
-    else:
-        d = for_date
-    start = datetime(d.year, d.month, d.day, 0, 0, 0)
-    end = start + timedelta(days=1)
-    return start, end
-
-async def get_users_mood_check_ins_for_date(
-    for_date: Union[str, date, datetime],
-) -> List[Dict[str, Any]]:
-    """
-    Get the latest mood check-in per user within the given day.
-    Returns a list of dicts with: user_id, mood_1, mood_2, mood_3.
-    """
-    start_dt, end_dt = _day_bounds(for_date)
-
-    query = """
+_LATEST_CHECK_IN_QUERY = """
         WITH ranked AS (
             SELECT
                 user_id,
@@ -45,9 +23,20 @@ async def get_users_mood_check_ins_for_date(
         FROM ranked
         WHERE rn = 1
         ORDER BY user_id
+"""
+
+async def get_users_mood_check_ins_for_date(
+    for_date: Union[str, date, datetime],
+) -> List[Dict[str, Any]]:
     """
+    Get the latest mood check-in per user within the given day.
+    Returns a list of dicts with: user_id, mood_1, mood_2, mood_3.
+    Kept for existing callers; batch consumers should use `get_users_mood_check_ins_soa`.
+    """
+    start_dt, end_dt = day_bounds(for_date)
+
     params = {"start_dt": start_dt, "end_dt": end_dt}
-    rows = await fetch_all(query, params)
+    rows = await fetch_all(_LATEST_CHECK_IN_QUERY, params)
     if not rows:
         return []
 
@@ -59,4 +48,29 @@ async def get_users_mood_check_ins_for_date(
             "mood_3": row.get("mood_3"),
         }
         for row in rows
-    ]
\ No newline at end of file
+    ]
+
+async def get_users_mood_check_ins_soa(
+    for_date: Union[str, date, datetime],
+    mood_index: Dict[str, int],
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Columnar variant of `get_users_mood_check_ins_for_date`.
+    Returns (user_ids as strings, codes) where codes is an (N, 3) int16 array holding the
+    `mood_index` position of mood_1..mood_3 (matched on the capitalized value), or -1
+    for empty/unknown moods.
+    """
+    start_dt, end_dt = day_bounds(for_date)
+
+    params = {"start_dt": start_dt, "end_dt": end_dt}
+    rows = await fetch_all(_LATEST_CHECK_IN_QUERY, params)
+
+    user_ids: List[str] = []
+    codes = np.full((len(rows), 3), -1, dtype=np.int16)
+    for i, row in enumerate(rows):
+        user_ids.append(str(row.get("user_id")))
+        for j, key in enumerate(("mood_1", "mood_2", "mood_3")):
+            raw = row.get(key)
+            if isinstance(raw, str):
+                codes[i, j] = mood_index.get(raw.strip().capitalize(), -1)
+    return user_ids, codes
@@ -1,11 +1,19 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import List, Iterable, Any, Optional
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.model.student_analytics_model import StudentAnalytics
 from app.model.student_classification_model import ClassificationLabel
-from dataclasses import asdict
+
+# Accepted spellings -> enum member; raw value/name hit before any normalization.
+_LABEL_LOOKUP = {
+    k: e
+    for e in ClassificationLabel
+    for k in (e.value, e.name, e.value.lower(), e.name.lower())
+}
 
 @dataclass
 class CreateStudentAnalytics:
@@ -40,6 +48,12 @@ class CreateStudentAnalytics:
     f_and_f_final_category: Optional[float] = None
     classification: Optional[str] = None
 
+# Plain-copied payload fields; the remaining three get defaults / enum coercion.
+_ANALYTICS_FIELDS = tuple(
+    f.name for f in fields(CreateStudentAnalytics)
+    if f.name not in ("analytics_id", "date_recorded", "classification")
+)
+
 class StudentAnalyticsRepository:
 
     def __init__(self, session_factory: sessionmaker):
@@ -51,35 +65,48 @@ class StudentAnalyticsRepository:
         if isinstance(val, ClassificationLabel):
             return val
         if isinstance(val, str):
-            normalized = val.strip().replace("-", "_").replace(" ", "_").lower()
-            for e in ClassificationLabel:
-                if e.value.lower() == normalized or e.name.lower() == normalized:
-                    return e
+            e = _LABEL_LOOKUP.get(val) or _LABEL_LOOKUP.get(val.strip().replace("-", "_").replace(" ", "_").lower())
+            if e is not None:
+                return e
         raise ValueError(f"Unknown classification: {val}")
 
-    async def create(self, payload: CreateStudentAnalytics) -> StudentAnalytics:
+    def _row_values(self, payload: CreateStudentAnalytics) -> dict:
+        data = {n: getattr(payload, n) for n in _ANALYTICS_FIELDS}
+        data["analytics_id"] = payload.analytics_id or uuid4()
+        data["date_recorded"] = payload.date_recorded or datetime.now(timezone.utc)
+        data["classification"] = self._to_enum(payload.classification)
+        return data
+
+    async def create(self, payload: CreateStudentAnalytics, refresh: bool = False) -> StudentAnalytics:
         async with self.session_factory() as session:  # type: AsyncSession
-            data = asdict(payload)
-            data["analytics_id"] = data.get("analytics_id") or uuid4()
-            data["date_recorded"] = data.get("date_recorded") or datetime.now(timezone.utc)
-            data["classification"] = self._to_enum(data.get("classification"))
-            inst = StudentAnalytics(**data)
+            inst = StudentAnalytics(**self._row_values(payload))
             session.add(inst)
             await session.commit()
-            await session.refresh(inst)
+            # every column is already set client-side; refresh only to re-read the stored row
+            if refresh:
+                await session.refresh(inst)
             return inst
 
     async def bulk_create(self, items: Iterable[CreateStudentAnalytics]) -> List[StudentAnalytics]:
-        created: List[StudentAnalytics] = []
+        values = [self._row_values(payload) for payload in items]
+        if not values:
+            return []
         async with self.session_factory() as session:  # type: AsyncSession
-            for payload in items:
-                data = asdict(payload)
-                data["analytics_id"] = data.get("analytics_id") or uuid4()
-                data["date_recorded"] = data.get("date_recorded") or datetime.now(timezone.utc)
-                data["classification"] = self._to_enum(data.get("classification"))
-                created.append(StudentAnalytics(**data))
-            session.add_all(created)
+            created = await self._insert_returning(session, values)
             await session.commit()
-            for inst in created:
-                await session.refresh(inst)
-            return created
\ No newline at end of file
+            return created
+
+    async def bulk_create_in_session(self, items: Iterable[CreateStudentAnalytics], session: AsyncSession) -> List[StudentAnalytics]:
+        """
+        Same as `bulk_create` but runs on a caller-owned session and does not commit,
+        so several writes can share one connection and transaction.
+        """
+        values = [self._row_values(payload) for payload in items]
+        if not values:
+            return []
+        return await self._insert_returning(session, values)
+
+    async def _insert_returning(self, session: AsyncSession, values: List[dict]) -> List[StudentAnalytics]:
+        # single INSERT ... RETURNING instead of add_all + one refresh SELECT per row
+        result = await session.execute(insert(StudentAnalytics).returning(StudentAnalytics), values)
+        return list(result.scalars().all())
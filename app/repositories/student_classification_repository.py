@@ -1,13 +1,20 @@
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional, Iterable, Any, List
+from datetime import datetime, timezone
+from typing import Optional, Iterable, Any, List, AsyncIterator
 from uuid import UUID, uuid4
-from sqlalchemy import desc, select
+from sqlalchemy import desc, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.model.student_classification_model import StudentClassification, ClassificationLabel
 from app.model.student_analytics_model import StudentAnalytics
 
+# Accepted spellings -> enum member, built once instead of scanning the enum per row.
+_LABEL_LOOKUP = {
+    k: e
+    for e in ClassificationLabel
+    for k in (e.value, e.name, e.name.replace("_", "-"))
+}
+
 @dataclass
 class CreateStudentClassification:
     student_id: UUID
@@ -25,9 +32,9 @@ class StudentClassificationRepository:
         if val is None:
             raise ValueError("classification is required")
         if isinstance(val, str):
-            for e in ClassificationLabel:
-                if e.value == val or e.name == val or e.name.replace("_", "-") == val:
-                    return e
+            e = _LABEL_LOOKUP.get(val)
+            if e is not None:
+                return e
         raise ValueError(f"Unknown classification: {val}")
 
     async def create(
@@ -36,36 +43,59 @@ class StudentClassificationRepository:
         classification: Any,
         classified_at: Optional[datetime] = None,
         classification_id: Optional[UUID] = None,
+        refresh: bool = False,
     ) -> StudentClassification:
         async with self.session_factory() as session:  # type: AsyncSession
             inst = StudentClassification(
                 classification_id=classification_id or uuid4(),
                 student_id=student_id,
                 classification=self._to_enum(classification),
-                classified_at=classified_at,
+                # stamped client-side so the returned row is complete without a refresh
+                classified_at=classified_at or datetime.now(timezone.utc),
             )
             session.add(inst)
             await session.commit()
-            await session.refresh(inst)
+            if refresh:
+                await session.refresh(inst)
             return inst
 
+    def _bulk_values(self, items: Iterable[CreateStudentClassification]) -> List[dict]:
+        # stamped client-side like `create`, so both write paths use the app's clock
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "classification_id": item.classification_id or uuid4(),
+                "student_id": item.student_id,
+                "classification": self._to_enum(item.classification),
+                "classified_at": item.classified_at or now,
+            }
+            for item in items
+        ]
+
     async def bulk_create(self, items: Iterable[CreateStudentClassification]) -> List[StudentClassification]:
-        created: List[StudentClassification] = []
-        async with self.session_factory() as session:
-            for item in items:
-                inst = StudentClassification(
-                    classification_id=item.classification_id or uuid4(),
-                    student_id=item.student_id,
-                    classification=self._to_enum(item.classification),
-                    classified_at=item.classified_at,
-                )
-                created.append(inst)
-            session.add_all(created)
+        values = self._bulk_values(items)
+        if not values:
+            return []
+        async with self.session_factory() as session:  # type: AsyncSession
+            created = await self._insert_returning(session, values)
             await session.commit()
-            for inst in created:
-               await session.refresh(inst)
             return created
 
+    async def bulk_create_in_session(self, items: Iterable[CreateStudentClassification], session: AsyncSession) -> List[StudentClassification]:
+        """
+        Same as `bulk_create` but runs on a caller-owned session and does not commit,
+        so several writes can share one connection and transaction.
+        """
+        values = self._bulk_values(items)
+        if not values:
+            return []
+        return await self._insert_returning(session, values)
+
+    async def _insert_returning(self, session: AsyncSession, values: List[dict]) -> List[StudentClassification]:
+        # single INSERT ... RETURNING instead of add_all + one refresh SELECT per row
+        result = await session.execute(insert(StudentClassification).returning(StudentClassification), values)
+        return list(result.scalars().all())
+
     async def get_by_id(self, classification_id: UUID) -> Optional[StudentClassification]:
         async with self.session_factory() as session:
             return await session.get(StudentClassification, classification_id)
@@ -92,34 +122,83 @@ class StudentClassificationRepository:
             result = await session.execute(stmt)
             return result.scalars().all()
 
-    async def list_all(self, limit: int = 1000, offset: int = 0) -> List[StudentClassification]:
+    async def stream_for_student(
+        self,
+        student_id: UUID,
+        limit: Optional[int] = None,
+        yield_per: int = 256,
+    ) -> AsyncIterator[StudentClassification]:
         """
-        Return up to `limit` StudentClassification rows ordered by classified_at descending.
-        Use `offset` for pagination.
+        Streaming variant of `list_for_student` for large histories: rows come from a
+        server-side cursor `yield_per` at a time instead of being materialized at once.
         """
         async with self.session_factory() as session:  # type: AsyncSession
             stmt = (
                 select(StudentClassification)
+                .where(StudentClassification.student_id == student_id)
                 .order_by(desc(StudentClassification.classified_at))
-                .limit(limit)
-                .offset(offset)
+                .execution_options(yield_per=yield_per)
             )
-            result = await session.execute(stmt)
-            return result.scalars().all()
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            result = await session.stream_scalars(stmt)
+            async for row in result:
+                yield row
 
-    async def list_between(self, start: datetime, end: datetime) -> List[StudentClassification]:
+    async def list_for_student_between(self, student_id: UUID, start: datetime, end: datetime) -> List[StudentClassification]:
         """
-        Return StudentClassification rows with classified_at in [start, end),
-        ordered by classified_at descending.
+        Return the student's StudentClassification rows with classified_at in [start, end),
+        ordered by classified_at ascending.
         """
         async with self.session_factory() as session:  # type: AsyncSession
             stmt = (
                 select(StudentClassification)
                 .where(
+                    StudentClassification.student_id == student_id,
                     StudentClassification.classified_at >= start,
                     StudentClassification.classified_at < end,
                 )
+                .order_by(StudentClassification.classified_at)
+            )
+            result = await session.execute(stmt)
+            return result.scalars().all()
+
+    async def list_all(self, limit: int = 1000, offset: int = 0) -> List[StudentClassification]:
+        """
+        Return up to `limit` StudentClassification rows ordered by classified_at descending.
+        Use `offset` for pagination.
+        """
+        async with self.session_factory() as session:  # type: AsyncSession
+            stmt = (
+                select(StudentClassification)
                 .order_by(desc(StudentClassification.classified_at))
+                .limit(limit)
+                .offset(offset)
             )
             result = await session.execute(stmt)
-            return result.scalars().all()
\ No newline at end of file
+            return result.scalars().all()
+
+    async def list_between(
+        self,
+        start: datetime,
+        end: datetime,
+        session: Optional[AsyncSession] = None,
+    ) -> List[StudentClassification]:
+        """
+        Return StudentClassification rows with classified_at in [start, end),
+        ordered by classified_at descending. Runs on `session` when one is given.
+        """
+        stmt = (
+            select(StudentClassification)
+            .where(
+                StudentClassification.classified_at >= start,
+                StudentClassification.classified_at < end,
+            )
+            .order_by(desc(StudentClassification.classified_at))
+        )
+        if session is not None:
+            result = await session.execute(stmt)
+            return result.scalars().all()
+        async with self.session_factory() as session:  # type: AsyncSession
+            result = await session.execute(stmt)
+            return result.scalars().all()
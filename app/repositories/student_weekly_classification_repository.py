@@ -2,28 +2,32 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.utils.db_utils import fetch_one, fetch_all, execute
+from app.utils.db_utils import fetch_one, fetch_all, execute, execute_batch
 from app.model.student_weekly_classification_model import WeeklyClassificationLabel
 
 
-def _row_to_dict(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    if not row:
-        return None
-    return {
-        "weekly_classification_id": str(row.get("weekly_classification_id")) if row.get("weekly_classification_id") is not None else None,
-        "student_id": str(row.get("student_id")) if row.get("student_id") is not None else None,
-        "week_start": row.get("week_start").isoformat() if row.get("week_start") is not None else None,
-        "week_end": row.get("week_end").isoformat() if row.get("week_end") is not None else None,
-        "dominant_classification": row.get("dominant_classification"),
-        "classified_at": row.get("classified_at").isoformat() if row.get("classified_at") is not None else None,
-    }
+# Shared by `create` (which appends RETURNING *) and `bulk_create`
+_INSERT_WEEKLY = """
+        INSERT INTO student_weekly_classification
+            (weekly_classification_id, student_id, week_start, week_end, dominant_classification, classified_at)
+        VALUES
+            (:weekly_classification_id, :student_id, :week_start, :week_end, :dominant_classification, COALESCE(:classified_at, now()))"""
+
+
+def _dominant_value(dominant_classification: Any) -> Optional[str]:
+    if isinstance(dominant_classification, WeeklyClassificationLabel):
+        return dominant_classification.value
+    return dominant_classification
 
 
 class StudentWeeklyClassificationRepository:
     """
     Repository for storing and retrieving StudentWeeklyClassification rows.
     Uses `fetch_one`, `fetch_all`, `execute` from `app.utils.db_utils`.
+    Rows are returned as driver values (UUID / datetime); JSON coercion is left to
+    the response layer.
     """
 
     async def create(
@@ -36,24 +40,15 @@ class StudentWeeklyClassificationRepository:
         weekly_classification_id: Optional[uuid.UUID] = None,
     ) -> Dict[str, Any]:
         """
-        Insert a new weekly classification and return the created row as dict.
+        Insert a new weekly classification and return the created row.
         `dominant_classification` may be a WeeklyClassificationLabel or string.
         """
-        if isinstance(dominant_classification, WeeklyClassificationLabel):
-            dc = dominant_classification.value
-        else:
-            dc = dominant_classification
+        dc = _dominant_value(dominant_classification)
 
         if weekly_classification_id is None:
             weekly_classification_id = uuid.uuid4()
 
-        query = """
-        INSERT INTO student_weekly_classification
-            (weekly_classification_id, student_id, week_start, week_end, dominant_classification, classified_at)
-        VALUES
-            (:weekly_classification_id, :student_id, :week_start, :week_end, :dominant_classification, COALESCE(:classified_at, now()))
-        RETURNING *;
-        """
+        query = _INSERT_WEEKLY + "\n        RETURNING *;"
         params = {
             "weekly_classification_id": str(weekly_classification_id),
             "student_id": student_id,
@@ -63,12 +58,33 @@ class StudentWeeklyClassificationRepository:
             "classified_at": classified_at,
         }
         row = await fetch_one(query, params)
-        return _row_to_dict(row)
+        return row
+
+    async def bulk_create(self, rows: List[Dict[str, Any]], session: Optional[AsyncSession] = None) -> None:
+        """
+        Insert many weekly classifications in one executemany batch.
+        Each row takes the same keys as `create`; ids are generated client-side when
+        missing, so no RETURNING round-trip is needed. On a caller-provided `session`
+        the commit is left to the caller.
+        """
+        query = _INSERT_WEEKLY + ";"
+        params = [
+            {
+                "weekly_classification_id": str(r.get("weekly_classification_id") or uuid.uuid4()),
+                "student_id": r["student_id"],
+                "week_start": r["week_start"],
+                "week_end": r["week_end"],
+                "dominant_classification": _dominant_value(r.get("dominant_classification")),
+                "classified_at": r.get("classified_at"),
+            }
+            for r in rows
+        ]
+        await execute_batch(query, params, session=session)
 
     async def get_by_id(self, weekly_classification_id: str) -> Optional[Dict[str, Any]]:
         query = "SELECT * FROM student_weekly_classification WHERE weekly_classification_id = :id LIMIT 1;"
         row = await fetch_one(query, {"id": weekly_classification_id})
-        return _row_to_dict(row)
+        return row
 
     async def get_by_student_and_week(self, student_id: str, week_start: datetime) -> Optional[Dict[str, Any]]:
         """
@@ -80,7 +96,7 @@ class StudentWeeklyClassificationRepository:
         LIMIT 1;
         """
         row = await fetch_one(query, {"student_id": student_id, "week_start": week_start})
-        return _row_to_dict(row)
+        return row
 
     async def get_latest_for_student(self, student_id: str) -> Optional[Dict[str, Any]]:
         query = """
@@ -90,7 +106,7 @@ class StudentWeeklyClassificationRepository:
         LIMIT 1;
         """
         row = await fetch_one(query, {"student_id": student_id})
-        return _row_to_dict(row)
+        return row
 
     async def list_for_student(
         self,
@@ -118,7 +134,7 @@ class StudentWeeklyClassificationRepository:
             params = {"student_id": student_id}
 
         rows = await fetch_all(query, params)
-        return [ _row_to_dict(r) for r in (rows or []) ]
+        return [dict(r) for r in rows]
 
     async def delete_by_id(self, weekly_classification_id: str) -> bool:
         query = "DELETE FROM student_weekly_classification WHERE weekly_classification_id = :id;"
@@ -10,7 +10,7 @@ from app.config.datasource_config import SessionLocal
 router = APIRouter()
 
 # Resolve model feature columns: prefer env.MODEL_FEATURES, else use a safe default
-DEFAULT_FEATURES = [
+DEFAULT_FEATURES = (
     "p_anxiety", "p_normal", "p_depression", "p_suicidal", "p_stress",
     "gratitude_flag",
     "Depressed", "Sad", "Exhausted", "Hopeless",
@@ -19,11 +19,17 @@ DEFAULT_FEATURES = [
     "Happy", "Energized", "Excited", "Motivated",
     "flipfeel_incrisis_pct", "flipfeel_struggling_pct",
     "flipfeel_thriving_pct", "flipfeel_excelling_pct",
-]
-X_COLUMNS = getattr(env, "MODEL_FEATURES", DEFAULT_FEATURES)
+)
+# Resolved once at import and frozen so the order the model was trained on can't drift
+X_COLUMNS = tuple(getattr(env, "MODEL_FEATURES", DEFAULT_FEATURES))
 
 # Instantiate service and controller once at import
-clf_service = ClassificationService(model_path=env.MODEL_PATH, model_encoder=env.MODEL_LABEL_ENCODER_PATH, x_columns=X_COLUMNS)
+clf_service = ClassificationService(
+    model_path=env.MODEL_PATH,
+    model_encoder=env.MODEL_LABEL_ENCODER_PATH,
+    x_columns=X_COLUMNS,
+    score_cache_size=env.MODEL_SCORE_CACHE_SIZE,
+)
 
 student_analytics_repo = StudentAnalyticsRepository(session_factory=SessionLocal)
 student_classification_repo = StudentClassificationRepository(session_factory=SessionLocal)
@@ -33,6 +39,8 @@ clf_controller = ClassificationController(
     clf_service,
     student_analytics_repo,
     student_classification_repo,
+    inference_workers=env.MODEL_INFERENCE_WORKERS,
+    session_factory=SessionLocal,
 )
 
 @router.post("/daily-scheduler")
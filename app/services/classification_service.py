@@ -1,9 +1,32 @@
-from typing import List, Dict, Optional, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Tuple, Union
 import joblib
-import pandas as pd
 import numpy as np
+import threading
+import warnings
 from sklearn.preprocessing import LabelEncoder
 
+# Feature matrices are plain ndarrays in x_columns order (checked against the model's
+# feature_names_in_ at init); sklearn would otherwise warn on every scoring call because
+# the model was fitted on a DataFrame with column names.
+@contextmanager
+def _ignore_missing_feature_names():
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names", category=UserWarning)
+        yield
+
+def _build_extractor(columns: tuple):
+    """
+    Compile `extract(row) -> tuple` returning row.get(col, 0.0) for each column, in order.
+    Column names are embedded via repr(), so any string is safe.
+    """
+    body = "".join(f"get({col!r}, 0.0), " for col in columns)
+    src = f"def extract(row):\n    get = row.get\n    return ({body})\n"
+    ns: Dict = {}
+    exec(compile(src, "<feature-extract>", "exec"), ns)
+    return ns["extract"]
+
 class ClassificationService:
     """
     Random Forest based classification service.
@@ -12,6 +35,8 @@ class ClassificationService:
     - x_columns: list of feature column names used at training time (order matters)
     - label_encoder: optional LabelEncoder instance (used if model_encoder path not provided)
     - class_names: optional list of class names (overrides label_encoder)
+    - score_cache_size: how many distinct feature vectors to keep scored results for
+      (least recently used are evicted first); 0 disables the cache
     """
     def __init__(
         self,
@@ -20,8 +45,14 @@ class ClassificationService:
         x_columns: List[str] = None,
         label_encoder: Optional[LabelEncoder] = None,
         class_names: Optional[List[str]] = None,
+        score_cache_size: int = 4096,
     ):
         self.model = joblib.load(model_path)
+        # scoring batches are small: joblib worker start-up would outweigh the tree walks,
+        # and the caller already runs inference off the event loop
+        estimator = self.model.steps[-1][1] if hasattr(self.model, "steps") else self.model
+        if hasattr(estimator, "n_jobs"):
+            estimator.n_jobs = 1
         # prefer loading a label encoder from the provided path, else use the given instance
         if model_encoder:
             self.le = joblib.load(model_encoder)
@@ -29,6 +60,25 @@ class ClassificationService:
             self.le = label_encoder
 
         self.x_columns = x_columns or []
+        self._col_tuple = tuple(self.x_columns)
+        # scoring passes bare ndarrays, so sklearn can no longer match columns by name:
+        # refuse to start if x_columns is not exactly the order the model was fitted on
+        fitted_names = getattr(self.model, "feature_names_in_", None)
+        if fitted_names is not None and tuple(fitted_names) != self._col_tuple:
+            raise ValueError(
+                f"x_columns {list(self._col_tuple)} do not match the model's "
+                f"feature_names_in_ {list(fitted_names)}"
+            )
+        # x_columns is fixed for the service's lifetime, so the row -> feature tuple
+        # lookup is generated once as straight-line code instead of a per-row column loop
+        self._extract = _build_extractor(self._col_tuple)
+        # per-thread feature buffer reused across calls, grown only when a batch is larger
+        self._buf = threading.local()
+        # float32 feature-row bytes -> (decoded prediction, probability row). Quiet students
+        # send the same vector day after day, so their forest traversal is only paid once.
+        self._score_cache_size = max(0, int(score_cache_size))
+        self._score_cache: Optional[OrderedDict] = OrderedDict() if self._score_cache_size else None
+        self._score_cache_lock = threading.Lock()
 
         if class_names is not None:
             self.class_names = class_names
@@ -36,45 +86,51 @@ class ClassificationService:
             self.class_names = list(self.le.classes_)
         else:
             self.class_names = list(getattr(self.model, "classes_", [])) or [str(i) for i in range(getattr(self.model, "n_classes_", 0))]
+        # probability-dict keys, one per column of predict_proba
+        self._class_keys = [str(cls) for cls in self.class_names]
 
-    def _prepare_input(self, input_data: Union[Dict, List[Dict]]) -> pd.DataFrame:
-        df = pd.DataFrame(input_data if isinstance(input_data, list) else [input_data])
-        # add missing columns with zeros
-        for col in self.x_columns:
-            if col not in df.columns:
-                df[col] = 0
-        # reorder
-        df = df[self.x_columns]
-        return df
-
-    def classify_user(self, input_data: Union[Dict, List[Dict]], top_k: Optional[int] = None):
-        """
-        input_data: single dict or list of dicts with feature values
-        top_k: if set, return only top_k classes per example
-
-        Returns:
-            single result dict if input_data was a dict, else list of dicts.
-            Each result: { "prediction": <class>, "probabilities": {class: prob, ...} }
-        """
-        single_input = isinstance(input_data, dict)
-        df = self._prepare_input(input_data)
+        # Probe once whether predictions are integer codes into the label encoder, so they
+        # can be decoded by indexing instead of a per-batch inverse_transform
+        self._classes_np = np.asarray(self.le.classes_) if self.le is not None else None
+        model_classes = np.asarray(getattr(self.model, "classes_", []))
+        self._decode_by_index = (
+            self._classes_np is not None
+            and model_classes.size > 0
+            and np.issubdtype(model_classes.dtype, np.integer)
+            and bool(((model_classes >= 0) & (model_classes < len(self._classes_np))).all())
+        )
 
-        # predictions (encoded or label strings depending on model)
-        preds = self.model.predict(df)
+    def _prepare_input(self, input_data: Union[Dict, List[Dict]]) -> np.ndarray:
+        rows = input_data if isinstance(input_data, list) else [input_data]
+        n = len(rows)
+        buf = getattr(self._buf, "arr", None)
+        if buf is None or buf.shape[0] < n:
+            buf = self._buf.arr = np.empty((n, len(self._col_tuple)), dtype=np.float32)
+        # fill a float32 matrix in x_columns order; missing features are 0, None becomes NaN
+        arr = buf[:n]
+        if n:
+            extract = self._extract
+            arr[:] = [extract(row) for row in rows]
+        return arr
 
-        # try to decode using label encoder if provided
+    def _decode_fallback(self, preds) -> list:
         try:
             if self.le is not None:
-                decoded_preds = list(self.le.inverse_transform(preds))
-            else:
-                decoded_preds = list(preds)
+                return list(self.le.inverse_transform(preds))
+            return list(preds)
         except Exception:
-            decoded_preds = list(preds)
+            return list(preds)
 
-        # probabilities
+    def _score(self, df: np.ndarray) -> Tuple[np.ndarray, list]:
+        """Run the model on a feature matrix; returns (probabilities, decoded predictions)."""
         if hasattr(self.model, "predict_proba"):
-            proba = self.model.predict_proba(df)
+            # one forest traversal: predict() would recompute these and take the argmax
+            with _ignore_missing_feature_names():
+                proba = self.model.predict_proba(df)
+            preds = np.asarray(self.model.classes_).take(proba.argmax(axis=1))
         else:
+            with _ignore_missing_feature_names():
+                preds = self.model.predict(df)
             # fallback: if no predict_proba, create one-hot like probabilities
             proba = np.zeros((len(df), len(self.class_names)))
             for i, p in enumerate(preds):
@@ -89,19 +145,82 @@ class ClassificationService:
                 if 0 <= idx < proba.shape[1]:
                     proba[i, idx] = 1.0
 
+        # try to decode using label encoder if provided
+        if self._decode_by_index:
+            decoded_preds = list(self._classes_np.take(preds))
+        else:
+            decoded_preds = self._decode_fallback(preds)
+        return proba, decoded_preds
+
+    def _score_cached(self, df: np.ndarray) -> Tuple[list, list]:
+        """
+        `_score` through the LRU cache: rows already seen are served from it, and only
+        the distinct unseen rows (each once, however often it repeats in the batch) go
+        through the model. Returns (decoded predictions, probability rows).
+        """
+        cache = self._score_cache
+        row_keys = [r.tobytes() for r in df]
+        hits: list = [None] * len(row_keys)
+        miss_at: Dict[bytes, int] = {}
+        with self._score_cache_lock:
+            for i, key in enumerate(row_keys):
+                hit = cache.get(key)
+                if hit is not None:
+                    cache.move_to_end(key)
+                    hits[i] = hit
+                elif key not in miss_at:
+                    miss_at[key] = i
+
+        if miss_at:
+            proba, decoded = self._score(df[list(miss_at.values())])
+            scored = dict(zip(miss_at, zip(decoded, proba.tolist())))
+            with self._score_cache_lock:
+                cache.update(scored)
+                while len(cache) > self._score_cache_size:
+                    cache.popitem(last=False)
+            for i, key in enumerate(row_keys):
+                if hits[i] is None:
+                    hits[i] = scored[key]
+
+        return [h[0] for h in hits], [h[1] for h in hits]
+
+    def classify_user(self, input_data: Union[Dict, List[Dict], np.ndarray], top_k: Optional[int] = None):
+        """
+        input_data: single dict or list of dicts with feature values, or a 2-D ndarray
+            whose columns are already in x_columns order
+        top_k: if set, return only top_k classes per example
+
+        Returns:
+            single result dict if input_data was a dict, else list of dicts.
+            Each result: { "prediction": <class>, "probabilities": {class: prob, ...} }
+        """
+        single_input = isinstance(input_data, dict)
+        if isinstance(input_data, np.ndarray):
+            # sklearn trees split on float32 thresholds: float32 C-contiguous input is used
+            # as-is, narrower inputs (e.g. float16) are upcast here exactly once
+            df = np.ascontiguousarray(input_data, dtype=np.float32)
+        else:
+            df = self._prepare_input(input_data)
+
+        if self._score_cache is None:
+            proba, decoded_preds = self._score(df)
+            proba_rows = proba.tolist()
+        else:
+            decoded_preds, proba_rows = self._score_cached(df)
+
+        keys = self._class_keys or [str(i) for i in range(len(proba_rows[0]) if proba_rows else 0)]
+        # stable descending order per row (ties keep class order, as sorted() did); top_k
+        # then slices each row's index list exactly like the old list slicing
+        order_rows = None
+        if top_k is not None and proba_rows:
+            order_rows = np.argsort(-np.asarray(proba_rows), axis=1, kind="stable").tolist()
+
         results = []
-        for row_idx, probs_row in enumerate(proba):
-            # map class names to probabilities
-            if self.class_names:
-                prob_map = {str(cls): float(probs_row[i]) for i, cls in enumerate(self.class_names)}
+        for row_idx, probs_row in enumerate(proba_rows):
+            if order_rows is None:
+                prob_map = dict(zip(keys, probs_row))
             else:
-                prob_map = {str(i): float(p) for i, p in enumerate(probs_row)}
-
-            # sort and apply top_k if requested
-            sorted_items = sorted(prob_map.items(), key=lambda x: x[1], reverse=True)
-            if top_k is not None:
-                sorted_items = sorted_items[:top_k]
-                prob_map = dict(sorted_items)
+                prob_map = {keys[j]: probs_row[j] for j in order_rows[row_idx][:top_k]}
 
             result = {
                 "prediction": decoded_preds[row_idx],
@@ -1,5 +1,6 @@
 from typing import List, Dict, Any, Optional
 from collections import Counter
+from operator import attrgetter
 from datetime import datetime, timedelta
 from uuid import UUID
 
@@ -7,19 +8,20 @@ from app.repositories.student_classification_repository import StudentClassifica
 from app.repositories.student_weekly_classification_repository import StudentWeeklyClassificationRepository
 
 
-# severity ordering for trend detection (lower = better)
+# severity ordering for trend detection (lower = better), keyed by lowercase label
 _SEVERITY_ORDER = {
-    "Excelling": 0,
-    "Thriving": 1,
-    "Struggling": 2,
-    "InCrisis": 3,
-    # allow alternative forms if present
-    "Excelling".lower(): 0,
-    "Thriving".lower(): 1,
-    "Struggling".lower(): 2,
-    "InCrisis".lower(): 3,
+    "excelling": 0,
+    "thriving": 1,
+    "struggling": 2,
+    "incrisis": 3,
 }
 
+_get_classification = attrgetter("classification")
+
+def _severity(label: str) -> int:
+    """Severity of a label matched case-insensitively, or -1 when unknown."""
+    return _SEVERITY_ORDER.get(label.lower(), -1)
+
 def _classification_to_str(c: Any) -> Optional[str]:
     if c is None:
         return None
@@ -55,112 +57,103 @@ class WeeklyClassificationService:
         student_id: UUID,
         week_start: datetime,
         week_end: datetime,
+        week_entries: Optional[List[Any]] = None,
+        persist: bool = True,
     ) -> Dict[str, Any]:
         """
         Compute weekly metrics and flag according to rules, persist a weekly record.
         Returns a dict with computed metrics, flags, and the persisted row (if created).
+        `week_entries` may carry the student's daily classifications for the week (oldest
+        first) when the caller already loaded them; otherwise they are fetched here.
+        With `persist=False` nothing is written and `persisted_row` is None, so a batch
+        caller can insert all weekly rows at once.
         """
-        # Fetch recent daily classifications (take a reasonably large limit)
-        # repository returns list ordered by classified_at desc (per its implementation)
-        items = await self.classification_repo.list_for_student(student_id, limit=200)
-
-        # Filter to entries within [week_start, week_end)
-        week_entries = [
-            it for it in items
-            if getattr(it, "classified_at", None) is not None
-               and (it.classified_at >= week_start and it.classified_at < week_end)
-        ]
+        # Daily classifications within [week_start, week_end), oldest first
+        if week_entries is None:
+            week_entries = await self.classification_repo.list_for_student_between(student_id, week_start, week_end)
 
-        # Normalize into (date, label_str) and sort ascending by date
-        normalized: List[Dict[str, Any]] = []
-        for it in week_entries:
-            label = _classification_to_str(getattr(it, "classification", None))
-            normalized.append({"date": it.classified_at, "label": label})
-        normalized.sort(key=lambda x: x["date"])
+        labels = [
+            label for label in map(_classification_to_str, map(_get_classification, week_entries))
+            if label is not None
+        ]
 
-        labels = [x["label"] for x in normalized if x["label"] is not None]
+        # One pass: exact-label counts for the dominant pick, lowercase counts for the rules
+        counts: Counter = Counter()
+        counts_lc: Counter = Counter()
+        for lab in labels:
+            counts[lab] += 1
+            counts_lc[lab.lower()] += 1
 
         # Dominant classification: most common; on tie choose the most recent occurrence among tied labels
         dominant = None
-        if labels:
-            counts = Counter(labels)
+        if counts:
             most_common_count = max(counts.values())
-            candidates = [lab for lab, cnt in counts.items() if cnt == most_common_count]
+            candidates = {lab for lab, cnt in counts.items() if cnt == most_common_count}
             if len(candidates) == 1:
-                dominant = candidates[0]
+                dominant = next(iter(candidates))
             else:
-                # pick most recent label from normalized list that is in candidates
-                for rec in reversed(normalized):
-                    if rec["label"] in candidates:
-                        dominant = rec["label"]
-                        break
+                # labels is in date order, so the first tied label from the end is the most recent
+                dominant = next(lab for lab in reversed(labels) if lab in candidates)
 
         # computed metrics
-        count_in_crisis = sum(1 for l in labels if (l and l.lower() == "incrisis".lower()))
-        count_struggling = sum(1 for l in labels if (l and l.lower() == "struggling".lower()))
+        count_in_crisis = counts_lc["incrisis"]
+        count_struggling = counts_lc["struggling"]
         total_valid_days = len(labels)
 
         # recent trend - last 3 days' labels
-        last3 = [l for l in labels[-3:]]
-        # convert to severity ints when possible
-        def severity(label: Optional[str]) -> Optional[int]:
-            if not label:
-                return None
-            return _SEVERITY_ORDER.get(label, _SEVERITY_ORDER.get(label.lower()))
-
-        last3_sev = [severity(l) for l in last3]
+        last3 = labels[-3:]
 
         # Rule evaluations
         reasons: List[str] = []
         flag = False
-        review_for_missing = False
-
-        # R6: Missing data (<4 valid daily classifications)
-        if total_valid_days < 4:
-            review_for_missing = True
-            reasons.append("R6: <4 valid daily classifications (data anomaly)")
-
-        # R1: Critical frequency
-        if count_in_crisis >= 2:
-            flag = True
-            reasons.append("R1: count_in_crisis >= 2")
-
-        # R2: Persistent struggle
-        if count_struggling >= 4:
-            flag = True
-            reasons.append("R2: count_struggling >= 4")
-
-        # R3: Downward trend - last 3 days strictly worsening severity
-        if len(last3_sev) == 3 and None not in last3_sev:
-            if last3_sev[0] < last3_sev[1] < last3_sev[2]:
-                flag = True
-                reasons.append("R3: downward trend in last 3 days")
+        review_for_missing = total_valid_days < 4
 
-        # R4: Mixed but worrying
-        if (count_in_crisis + count_struggling) >= 3:
-            last_label = last3[-1] if last3 else (labels[-1] if labels else None)
-            if last_label and last_label.lower() in ("struggling", "incrisis"):
-                flag = True
-                reasons.append("R4: mixed but worrying counts and last is Struggling or InCrisis")
-
-        # R5: Stable improvement -> explicit do-not-flag override
+        # R5: Stable improvement -> explicit do-not-flag override. It discards every other
+        # rule's flag and explanation, so R1-R4 (and the severities) are only evaluated without it.
         if len(last3) == 3 and all((l and l.lower() in ("thriving", "excelling")) for l in last3):
-            # override any flag
-            flag = False
-            reasons = [r for r in reasons if not r.startswith("R")]  # remove rule explanations if desired
             reasons.append("R5: stable improvement (do not flag)")
+        else:
+            # R6: Missing data (<4 valid daily classifications)
+            if review_for_missing:
+                reasons.append("R6: <4 valid daily classifications (data anomaly)")
+
+            # R1: Critical frequency
+            if count_in_crisis >= 2:
+                flag = True
+                reasons.append("R1: count_in_crisis >= 2")
+
+            # R2: Persistent struggle
+            if count_struggling >= 4:
+                flag = True
+                reasons.append("R2: count_struggling >= 4")
+
+            # R3: Downward trend - last 3 days strictly worsening severity
+            # (an unknown label is -1, and 0 <= s0 rules it out anywhere in the chain)
+            if len(last3) == 3:
+                s0, s1, s2 = map(_severity, last3)
+                if 0 <= s0 < s1 < s2:
+                    flag = True
+                    reasons.append("R3: downward trend in last 3 days")
+
+            # R4: Mixed but worrying
+            if (count_in_crisis + count_struggling) >= 3:
+                last_label = last3[-1] if last3 else (labels[-1] if labels else None)
+                if last_label and last_label.lower() in ("struggling", "incrisis"):
+                    flag = True
+                    reasons.append("R4: mixed but worrying counts and last is Struggling or InCrisis")
 
         # Persist weekly classification (dominant may be None)
-        try:
-            created = await self.weekly_repo.create(
-                student_id=str(student_id),
-                week_start=week_start,
-                week_end=week_end,
-                dominant_classification=dominant,
-            )
-        except Exception as exc:
-            created = None
-            reasons.append(f"persist_error: {exc}")
+        created = None
+        if persist:
+            try:
+                created = await self.weekly_repo.create(
+                    student_id=str(student_id),
+                    week_start=week_start,
+                    week_end=week_end,
+                    dominant_classification=dominant,
+                )
+            except Exception as exc:
+                reasons.append(f"persist_error: {exc}")
 
         result = {
             "student_id": str(student_id),
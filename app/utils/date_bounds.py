@@ -0,0 +1,33 @@
+# app/utils/date_bounds.py
+"""
+Day-range helper shared by the repositories that filter rows by calendar day.
+"""
+
+from functools import lru_cache
+from typing import Union, Tuple
+from datetime import datetime, date, time, timedelta
+
+_ONE_DAY = timedelta(days=1)
+
+
+@lru_cache(maxsize=1024)
+def _bounds_for_date(d: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(d, time.min)
+    return start, start + _ONE_DAY
+
+
+@lru_cache(maxsize=1024)
+def _bounds_for_str(s: str) -> Tuple[datetime, datetime]:
+    return _bounds_for_date(datetime.strptime(s, "%Y-%m-%d").date())
+
+
+def day_bounds(for_date: Union[str, date, datetime]) -> Tuple[datetime, datetime]:
+    """
+    Normalize a date-like input to start/end datetimes for that day [start, next day).
+    Accepts 'YYYY-MM-DD' string, date, or datetime. Results are memoized per day.
+    """
+    if isinstance(for_date, str):
+        return _bounds_for_str(for_date)
+    if isinstance(for_date, datetime):
+        for_date = for_date.date()
+    return _bounds_for_date(for_date)
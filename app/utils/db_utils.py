@@ -3,61 +3,137 @@
 Utility functions for performing direct SQL queries using SQLAlchemy.
 """
 
-from typing import Optional, Dict, Any, List
+import re
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Sequence, AsyncIterator, Tuple
 from sqlalchemy import text
-from sqlalchemy.engine import Result
+from sqlalchemy.engine import Result, RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.datasource_config import SessionLocal
 
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+_RETURNING_RE = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+
 
 def _is_write_query(query: str) -> bool:
     """Check if query is a write operation that needs a commit."""
     if not query:
         return False
-    q = query.strip().split()[0].upper()
-    return q in ("INSERT", "UPDATE", "DELETE") or "RETURNING" in query.upper()
+    q = query.lstrip()
+    return q[:6].upper().startswith(_WRITE_PREFIXES) or _RETURNING_RE.search(q) is not None
+
+
+@asynccontextmanager
+async def _session_scope(session: Optional[AsyncSession]) -> AsyncIterator[Tuple[AsyncSession, bool]]:
+    """
+    Yield (session, owned). A caller-provided session is reused as-is and the caller
+    keeps control of the transaction; otherwise a fresh session is opened and owned here.
+    """
+    if session is not None:
+        yield session, False
+        return
+    async with SessionLocal() as own:
+        yield own, True
 
 
-async def fetch_one(query: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+async def fetch_one(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    session: Optional[AsyncSession] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Execute a query and return a single row as a dict (or None).
-    Commits for write queries (INSERT/UPDATE/DELETE or queries with RETURNING).
+    Commits for write queries (INSERT/UPDATE/DELETE or queries with RETURNING),
+    unless run on a caller-provided `session`.
     """
-    async with SessionLocal() as session:
+    async with _session_scope(session) as (session, owned):
         result: Result = await session.execute(text(query), params or {})
         row = result.mappings().first()
-        if _is_write_query(query):
+        if owned and _is_write_query(query):
             await session.commit()
         return dict(row) if row is not None else None
 
 
-async def fetch_all(query: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+async def fetch_all(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    session: Optional[AsyncSession] = None,
+) -> List[RowMapping]:
     """
-    Execute a query and return all rows as a list of dicts.
-    Commits for write queries.
+    Execute a query and return all rows as a list of read-only mappings
+    (dict-like: `row["col"]`, `row.get("col")`). Wrap in `dict()` where a
+    mutable copy is needed. Commits for write queries, unless run on a
+    caller-provided `session`.
     """
-    async with SessionLocal() as session:
+    async with _session_scope(session) as (session, owned):
         result: Result = await session.execute(text(query), params or {})
         rows = result.mappings().all()
-        if _is_write_query(query):
+        if owned and _is_write_query(query):
             await session.commit()
-        return [dict(r) for r in rows] if rows else []
+        return list(rows)
 
 
-async def execute_query(query: str, params: Optional[Dict[str, Any]] = None):
-    async with SessionLocal() as session:
+async def execute_query(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    session: Optional[AsyncSession] = None,
+):
+    async with _session_scope(session) as (session, owned):
         await session.execute(text(query), params or {})
-        await session.commit()
+        if owned:
+            await session.commit()
 
 
-async def execute(query: str, params: Optional[Dict[str, Any]] = None) -> int:
+async def execute(
+    query: str,
+    params: Optional[Dict[str, Any]] = None,
+    session: Optional[AsyncSession] = None,
+) -> int:
     """
     Execute a write/update/delete statement, commit, and return affected row count.
+    On a caller-provided `session` the commit is left to the caller.
     """
-    async with SessionLocal() as session:
+    async with _session_scope(session) as (session, owned):
         result: Result = await session.execute(text(query), params or {})
-        await session.commit()
+        if owned:
+            await session.commit()
         try:
             rc = result.rowcount
             return int(rc) if rc is not None else 0
         except Exception:
-            return 0
\ No newline at end of file
+            return 0
+
+
+async def execute_batch(
+    query: str,
+    params_seq: Sequence[Dict[str, Any]],
+    session: Optional[AsyncSession] = None,
+) -> None:
+    """
+    Execute one write statement for many parameter sets in a single driver
+    executemany call, then commit once (left to the caller on a provided `session`).
+    """
+    if not params_seq:
+        return
+    async with _session_scope(session) as (session, owned):
+        await session.execute(text(query), list(params_seq))
+        if owned:
+            await session.commit()
+
+
+async def execute_many(
+    statements: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+    session: Optional[AsyncSession] = None,
+) -> None:
+    """
+    Execute several (query, params) statements in order inside one transaction and
+    commit once, instead of one commit per statement as with `execute_query`.
+    On a caller-provided `session` the commit is left to the caller.
+    """
+    if not statements:
+        return
+    async with _session_scope(session) as (session, owned):
+        for query, params in statements:
+            await session.execute(text(query), params or {})
+        if owned:
+            await session.commit()
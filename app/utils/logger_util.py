@@ -3,6 +3,34 @@ import logging
 import os
 from typing import Optional
 
+try:
+    import orjson  # type: ignore
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # optional speedup; stdlib json is the fallback
+    import json
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+class _JsonFormatter(logging.Formatter):
+    """One JSON object per record, serialized in a single dumps call (messages are escaped)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "module": record.name,
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return _dumps(payload)
+
 def _configure_logger(name: str = "nlp_worker") -> logging.Logger:
     env_mode = os.getenv("ENVIRONMENT", "development")
     logger = logging.getLogger(name)
@@ -15,9 +43,7 @@ def _configure_logger(name: str = "nlp_worker") -> logging.Logger:
 
     # Choose formatter based on environment
     if env_mode == "production":
-        formatter = logging.Formatter(
-            '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s", "module": "%(name)s"}'
-        )
+        formatter = _JsonFormatter()
     else:
         formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
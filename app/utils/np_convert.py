@@ -0,0 +1,58 @@
+# app/utils/np_convert.py
+"""
+Helpers for turning numpy scalars/arrays (e.g. sklearn outputs) into plain Python values.
+"""
+
+import json
+import numpy as np
+
+
+# Exact-type converters for the json default hook; numpy scalars all unwrap via .item()
+_DISPATCH = {
+    **{t: t.item for t in (
+        np.bool_,
+        np.int8, np.int16, np.int32, np.int64,
+        np.uint8, np.uint16, np.uint32, np.uint64,
+        np.float16, np.float32, np.float64,
+    )},
+    np.ndarray: np.ndarray.tolist,
+    set: list,
+    frozenset: list,
+}
+
+def _json_default(obj):
+    conv = _DISPATCH.get(type(obj))
+    if conv is not None:
+        return conv(obj)
+    # subclasses and platform-specific numpy types
+    if isinstance(obj, (np.integer,)):
+        return int(obj)
+    if isinstance(obj, (np.floating,)):
+        return float(obj)
+    if isinstance(obj, (np.bool_ ,)):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# Exact leaf types that are already plain Python (numpy scalars are never these exact types)
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+def _is_plain(obj) -> bool:
+    # Flat dict with str keys or flat list whose leaves are all plain; nothing to convert
+    if type(obj) is dict:
+        return all(type(k) is str for k in obj) and all(type(v) in _PLAIN_TYPES for v in obj.values())
+    if type(obj) is list:
+        return all(type(v) in _PLAIN_TYPES for v in obj)
+    return False
+
+def to_native(obj):
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    # e.g. classify_user's {class: float} maps, which are already built from proba.tolist()
+    if _is_plain(obj):
+        return obj
+    # Let the C json encoder walk nested containers; the hook only fires for numpy/set leaves
+    return json.loads(json.dumps(obj, default=_json_default))